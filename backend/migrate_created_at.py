@@ -0,0 +1,50 @@
+"""One-off migration: convert ISO-string `created_at` values to BSON dates.
+
+Run once against an existing database after deploying the server change
+that stores `created_at` as a native datetime:
+
+    python backend/migrate_created_at.py
+"""
+from datetime import datetime
+from pathlib import Path
+import os
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+COLLECTIONS = ["users", "students", "attendance", "grades", "announcements"]
+BATCH_SIZE = 500
+
+
+def migrate_collection(collection) -> int:
+    converted = 0
+    ops = []
+    cursor = collection.find({"created_at": {"$type": "string"}}, {"_id": 1, "created_at": 1})
+    for doc in cursor:
+        ops.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {"created_at": datetime.fromisoformat(doc["created_at"])}},
+        ))
+        if len(ops) >= BATCH_SIZE:
+            converted += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        converted += collection.bulk_write(ops, ordered=False).modified_count
+    return converted
+
+
+def main():
+    client = MongoClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        for name in COLLECTIONS:
+            print(f"{name}: converted {migrate_collection(db[name])} documents")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Migration: convert string UUID identifiers to native BSON UUIDs.
+
+The server runs this from its startup hook before serving requests, and
+records completion in the `_meta` collection so later boots skip it. It can
+also be run by hand against a database:
+
+    python backend/migrate_uuid_ids.py
+
+Values that are not valid UUID strings are left unchanged and reported.
+"""
+from pathlib import Path
+import asyncio
+import os
+import uuid
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+ROOT_DIR = Path(__file__).parent
+
+ID_FIELDS = {
+    "users": ["id"],
+    "students": ["id", "user_id", "parent_id"],
+    "attendance": ["id", "student_id", "marked_by"],
+    "grades": ["id", "student_id", "teacher_id"],
+    "announcements": ["id"],
+}
+BATCH_SIZE = 500
+MIGRATION_ID = "uuid_ids_migration"
+
+
+def _to_uuid(value):
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return None
+
+
+async def migrate_collection(collection, fields):
+    """Convert string ids in `fields`; return (converted count, unconverted ids).
+
+    Each unconverted entry is a (document _id, field, value) tuple.
+    """
+    converted = 0
+    unconverted = []
+    ops = []
+    query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+    async for doc in collection.find(query, projection):
+        update = {}
+        for field in fields:
+            value = doc.get(field)
+            if not isinstance(value, str):
+                continue
+            parsed = _to_uuid(value)
+            if parsed is None:
+                unconverted.append((doc["_id"], field, value))
+            else:
+                update[field] = parsed
+        if update:
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+        if len(ops) >= BATCH_SIZE:
+            converted += (await collection.bulk_write(ops, ordered=False)).modified_count
+            ops = []
+    if ops:
+        converted += (await collection.bulk_write(ops, ordered=False)).modified_count
+    return converted, unconverted
+
+
+async def migrate_uuid_ids(db, report=print, warn=print, force=False):
+    """Run the migration once per database unless `force` is set."""
+    if not force and await db["_meta"].find_one({"_id": MIGRATION_ID}):
+        return
+    for name, fields in ID_FIELDS.items():
+        converted, unconverted = await migrate_collection(db[name], fields)
+        report(f"{name}: converted {converted} documents")
+        for doc_id, field, value in unconverted:
+            warn(f"{name}: document {doc_id} has non-UUID {field}={value!r}; left unchanged")
+    await db["_meta"].update_one({"_id": MIGRATION_ID}, {"$set": {"done": True}}, upsert=True)
+
+
+async def main():
+    load_dotenv(ROOT_DIR / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], uuidRepresentation="standard")
+    try:
+        await migrate_uuid_ids(client[os.environ['DB_NAME']], force=True)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,45 +1,98 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
+import asyncio
 import logging
+import time
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter
 from typing import List, Optional, Literal
 import uuid
+from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
 import jwt
-from passlib.context import CryptContext
+import bcrypt
+
+from migrate_uuid_ids import migrate_uuid_ids
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    tz_aware=True,
+    uuidRepresentation="standard",
+    maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', 200)),
+    minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', 10)),
+    maxIdleTimeMS=int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 300_000)),
+    serverSelectionTimeoutMS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 3000)),
+    retryWrites=True,
+)
 db = client[os.environ['DB_NAME']]
 
 # JWT Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 24
+_JWT_ALGORITHMS = [JWT_ALGORITHM]
+_JWT_DECODE_OPTIONS = {"verify_signature": True, "verify_exp": True, "verify_aud": False, "verify_iss": False}
+
+# List endpoint pagination
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Authenticated user cache, keyed on the raw bearer token
+USER_CACHE_TTL_SECONDS = 60
+USER_CACHE_MAX_ENTRIES = 1024
+_user_cache: dict[str, tuple[float, "CurrentUser"]] = {}
+_CURRENT_USER_PROJECTION = {"_id": 0, "id": 1, "username": 1, "role": 1, "full_name": 1, "email": 1, "created_at": 1}
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = 12
 security = HTTPBearer()
 
 # Create the main app
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 
+@dataclass(slots=True)
+class CurrentUser:
+    id: uuid.UUID
+    username: str
+    role: str
+    full_name: str
+    email: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+@dataclass(slots=True)
+class CurrentClaims:
+    id: uuid.UUID
+    role: str
+
 # Utility Functions
+def utc_now() -> datetime:
+    # BSON dates hold milliseconds; truncate so responses match what a later read returns
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    except ValueError:
+        # Malformed or non-bcrypt hash stored for this user
+        return False
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
@@ -48,31 +101,69 @@ def create_access_token(data: dict) -> str:
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def _cache_user(token: str, user: CurrentUser, token_exp: Optional[float]):
+    now = time.monotonic()
+    ttl = USER_CACHE_TTL_SECONDS
+    if token_exp is not None:
+        # Never serve a cached user past the token's own expiry
+        ttl = min(ttl, token_exp - time.time())
+    if ttl <= 0:
+        return
+    if len(_user_cache) >= USER_CACHE_MAX_ENTRIES:
+        for key in [k for k, (expires, _) in _user_cache.items() if expires <= now]:
+            del _user_cache[key]
+        if len(_user_cache) >= USER_CACHE_MAX_ENTRIES:
+            del _user_cache[next(iter(_user_cache))]
+    _user_cache[token] = (now + ttl, user)
+
+def _decode_token(token: str) -> dict:
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
+        return jwt.decode(token, JWT_SECRET, algorithms=_JWT_ALGORITHMS, options=_JWT_DECODE_OPTIONS)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
 
+def _subject_id(payload: dict) -> uuid.UUID:
+    try:
+        return uuid.UUID(payload["sub"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> CurrentUser:
+    token = credentials.credentials
+    cached = _user_cache.get(token)
+    if cached is not None:
+        expires, user = cached
+        if expires > time.monotonic():
+            return user
+        _user_cache.pop(token, None)
+    payload = _decode_token(token)
+    user_doc = await db.users.find_one({"id": _subject_id(payload)}, _CURRENT_USER_PROJECTION)
+    if user_doc is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    user = CurrentUser(**user_doc)
+    _cache_user(token, user, payload.get("exp"))
+    return user
+
+async def get_current_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> CurrentClaims:
+    # Trusts the signed token's role claim; no users lookup. Use get_current_user
+    # where the caller's current database record matters.
+    payload = _decode_token(credentials.credentials)
+    role = payload.get("role")
+    if role is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    return CurrentClaims(id=_subject_id(payload), role=role)
+
 # Models
 class User(BaseModel):
     model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
     username: str
     role: Literal["admin", "teacher", "student", "parent"]
     full_name: str
     email: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utc_now)
 
 class UserCreate(BaseModel):
     username: str
@@ -92,41 +183,41 @@ class LoginResponse(BaseModel):
 
 class Student(BaseModel):
     model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    user_id: str
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    user_id: uuid.UUID
     full_name: str
     roll_number: str
     class_name: str
     section: str
-    parent_id: Optional[str] = None
+    parent_id: Optional[uuid.UUID] = None
     date_of_birth: Optional[str] = None
     address: Optional[str] = None
     phone: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utc_now)
 
 class StudentCreate(BaseModel):
     full_name: str
     roll_number: str
     class_name: str
     section: str
-    parent_id: Optional[str] = None
+    parent_id: Optional[uuid.UUID] = None
     date_of_birth: Optional[str] = None
     address: Optional[str] = None
     phone: Optional[str] = None
 
 class Attendance(BaseModel):
     model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    student_id: str
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    student_id: uuid.UUID
     student_name: str
     date: str
     status: Literal["present", "absent", "late"]
     subject: Optional[str] = None
-    marked_by: str
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    marked_by: uuid.UUID
+    created_at: datetime = Field(default_factory=utc_now)
 
 class AttendanceCreate(BaseModel):
-    student_id: str
+    student_id: uuid.UUID
     student_name: str
     date: str
     status: Literal["present", "absent", "late"]
@@ -134,19 +225,19 @@ class AttendanceCreate(BaseModel):
 
 class Grade(BaseModel):
     model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    student_id: str
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    student_id: uuid.UUID
     student_name: str
     subject: str
     exam_type: str
     marks: float
     max_marks: float
     date: str
-    teacher_id: str
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    teacher_id: uuid.UUID
+    created_at: datetime = Field(default_factory=utc_now)
 
 class GradeCreate(BaseModel):
-    student_id: str
+    student_id: uuid.UUID
     student_name: str
     subject: str
     exam_type: str
@@ -156,18 +247,43 @@ class GradeCreate(BaseModel):
 
 class Announcement(BaseModel):
     model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
     title: str
     content: str
     author: str
     target_role: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utc_now)
 
 class AnnouncementCreate(BaseModel):
     title: str
     content: str
     target_role: Optional[str] = None
 
+# Prebuilt serializers for list responses
+_STUDENT_LIST = TypeAdapter(List[Student])
+_ATTENDANCE_LIST = TypeAdapter(List[Attendance])
+_GRADE_LIST = TypeAdapter(List[Grade])
+_ANNOUNCEMENT_LIST = TypeAdapter(List[Announcement])
+
+# Per-collection write versions backing list ETags. Kept in Mongo rather than
+# in-process so every worker sees the same version.
+async def _collection_version(name: str) -> int:
+    doc = await db["_meta"].find_one({"_id": name}, {"version": 1})
+    return doc["version"] if doc else 0
+
+async def _bump_collection_version(name: str):
+    await db["_meta"].update_one({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
 # Authentication Routes
 @api_router.post("/auth/register", response_model=User)
 async def register(user_data: UserCreate):
@@ -177,24 +293,29 @@ async def register(user_data: UserCreate):
         raise HTTPException(status_code=400, detail="Username already exists")
     
     # Hash password and create user
-    hashed_password = hash_password(user_data.password)
-    user_dict = user_data.model_dump(exclude={"password"})
-    user_obj = User(**user_dict)
-    
-    doc = user_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    hashed_password = await run_in_threadpool(hash_password, user_data.password)
+    doc = {
+        **user_data.model_dump(exclude={"password"}),
+        "id": uuid.uuid4(),
+        "created_at": utc_now(),
+    }
+    user_obj = User.model_construct(**doc)
     doc['password'] = hashed_password
     
-    await db.users.insert_one(doc)
+    try:
+        await db.users.insert_one(doc)
+    except DuplicateKeyError:
+        # A concurrent registration claimed the username after our check
+        raise HTTPException(status_code=400, detail="Username already exists")
     return user_obj
 
 @api_router.post("/auth/login", response_model=LoginResponse)
 async def login(login_data: UserLogin):
     user = await db.users.find_one({"username": login_data.username}, {"_id": 0})
-    if not user or not verify_password(login_data.password, user["password"]):
+    if not user or not await run_in_threadpool(verify_password, login_data.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
-    access_token = create_access_token(data={"sub": user["id"], "role": user["role"]})
+    access_token = create_access_token(data={"sub": str(user["id"]), "role": user["role"]})
     user_obj = User(**user)
     
     return LoginResponse(
@@ -204,181 +325,253 @@ async def login(login_data: UserLogin):
     )
 
 @api_router.get("/auth/me", response_model=User)
-async def get_me(current_user: dict = Depends(get_current_user)):
-    return User(**current_user)
+async def get_me(current_user: CurrentUser = Depends(get_current_user)):
+    return User.model_validate(current_user, from_attributes=True)
 
 # Student Management Routes
 @api_router.post("/students", response_model=Student)
-async def create_student(student_data: StudentCreate, current_user: dict = Depends(get_current_user)):
-    if current_user["role"] not in ["admin", "teacher"]:
+async def create_student(student_data: StudentCreate, current_user: CurrentClaims = Depends(get_current_claims)):
+    if current_user.role not in ["admin", "teacher"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    student_obj = Student(**student_data.model_dump(), user_id=current_user["id"])
-    doc = student_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc = {
+        **student_data.model_dump(),
+        "id": uuid.uuid4(),
+        "user_id": current_user.id,
+        "created_at": utc_now(),
+    }
+    student_obj = Student.model_construct(**doc)
     
     await db.students.insert_one(doc)
+    await _bump_collection_version("students")
     return student_obj
 
-@api_router.get("/students", response_model=List[Student])
-async def get_students(current_user: dict = Depends(get_current_user)):
-    students = await db.students.find({}, {"_id": 0}).to_list(1000)
-    for student in students:
-        if isinstance(student.get('created_at'), str):
-            student['created_at'] = datetime.fromisoformat(student['created_at'])
-    return students
+@api_router.get("/students", response_model=None, responses={200: {"model": List[Student]}})
+async def get_students(
+    request: Request,
+    user_id: Optional[uuid.UUID] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    query = {}
+    if user_id:
+        query["user_id"] = user_id
+    
+    # Read the version before the data: a version older than the data only
+    # costs a spurious 200, whereas a newer one would pin stale rows behind 304s
+    etag = f'"students-{await _collection_version("students")}-{user_id}-{skip}-{limit}"'
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    
+    students, total = await asyncio.gather(
+        db.students.find(query, {"_id": 0}).sort("_id", 1).skip(skip).limit(limit).to_list(limit),
+        db.students.count_documents(query),
+    )
+    return ORJSONResponse(
+        _STUDENT_LIST.dump_python([Student.model_construct(**doc) for doc in students], mode="json"),
+        headers={"X-Total-Count": str(total), "ETag": etag, "Cache-Control": "private, no-cache"},
+    )
 
 @api_router.get("/students/{student_id}", response_model=Student)
-async def get_student(student_id: str, current_user: dict = Depends(get_current_user)):
+async def get_student(student_id: uuid.UUID, current_user: CurrentUser = Depends(get_current_user)):
     student = await db.students.find_one({"id": student_id}, {"_id": 0})
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
-    if isinstance(student.get('created_at'), str):
-        student['created_at'] = datetime.fromisoformat(student['created_at'])
     return Student(**student)
 
 @api_router.put("/students/{student_id}", response_model=Student)
-async def update_student(student_id: str, student_data: StudentCreate, current_user: dict = Depends(get_current_user)):
-    if current_user["role"] not in ["admin", "teacher"]:
+async def update_student(student_id: uuid.UUID, student_data: StudentCreate, current_user: CurrentClaims = Depends(get_current_claims)):
+    if current_user.role not in ["admin", "teacher"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    existing = await db.students.find_one({"id": student_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Student not found")
-    
     update_data = student_data.model_dump()
-    await db.students.update_one({"id": student_id}, {"$set": update_data})
-    
-    updated_student = await db.students.find_one({"id": student_id}, {"_id": 0})
-    if isinstance(updated_student.get('created_at'), str):
-        updated_student['created_at'] = datetime.fromisoformat(updated_student['created_at'])
+    updated_student = await db.students.find_one_and_update(
+        {"id": student_id},
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not updated_student:
+        raise HTTPException(status_code=404, detail="Student not found")
+    await _bump_collection_version("students")
     return Student(**updated_student)
 
 @api_router.delete("/students/{student_id}")
-async def delete_student(student_id: str, current_user: dict = Depends(get_current_user)):
-    if current_user["role"] != "admin":
+async def delete_student(student_id: uuid.UUID, current_user: CurrentClaims = Depends(get_current_claims)):
+    if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
     result = await db.students.delete_one({"id": student_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Student not found")
+    await _bump_collection_version("students")
     return {"message": "Student deleted successfully"}
 
 # Attendance Routes
 @api_router.post("/attendance", response_model=Attendance)
-async def mark_attendance(attendance_data: AttendanceCreate, current_user: dict = Depends(get_current_user)):
-    if current_user["role"] not in ["admin", "teacher"]:
+async def mark_attendance(attendance_data: AttendanceCreate, current_user: CurrentClaims = Depends(get_current_claims)):
+    if current_user.role not in ["admin", "teacher"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    attendance_obj = Attendance(**attendance_data.model_dump(), marked_by=current_user["id"])
-    doc = attendance_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc = {
+        **attendance_data.model_dump(),
+        "id": uuid.uuid4(),
+        "marked_by": current_user.id,
+        "created_at": utc_now(),
+    }
+    attendance_obj = Attendance.model_construct(**doc)
     
     await db.attendance.insert_one(doc)
     return attendance_obj
 
-@api_router.get("/attendance", response_model=List[Attendance])
-async def get_attendance(student_id: Optional[str] = None, date: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+@api_router.get("/attendance", response_model=None, responses={200: {"model": List[Attendance]}})
+async def get_attendance(
+    student_id: Optional[uuid.UUID] = None,
+    date: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: CurrentUser = Depends(get_current_user),
+):
     query = {}
     if student_id:
         query["student_id"] = student_id
     if date:
         query["date"] = date
     
-    attendance_records = await db.attendance.find(query, {"_id": 0}).to_list(1000)
-    for record in attendance_records:
-        if isinstance(record.get('created_at'), str):
-            record['created_at'] = datetime.fromisoformat(record['created_at'])
-    return attendance_records
+    attendance_records, total = await asyncio.gather(
+        db.attendance.find(query, {"_id": 0}).sort("_id", 1).skip(skip).limit(limit).to_list(limit),
+        db.attendance.count_documents(query),
+    )
+    return ORJSONResponse(
+        _ATTENDANCE_LIST.dump_python([Attendance.model_construct(**doc) for doc in attendance_records], mode="json"),
+        headers={"X-Total-Count": str(total)},
+    )
 
 # Grades Routes
 @api_router.post("/grades", response_model=Grade)
-async def add_grade(grade_data: GradeCreate, current_user: dict = Depends(get_current_user)):
-    if current_user["role"] not in ["admin", "teacher"]:
+async def add_grade(grade_data: GradeCreate, current_user: CurrentClaims = Depends(get_current_claims)):
+    if current_user.role not in ["admin", "teacher"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    grade_obj = Grade(**grade_data.model_dump(), teacher_id=current_user["id"])
-    doc = grade_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc = {
+        **grade_data.model_dump(),
+        "id": uuid.uuid4(),
+        "teacher_id": current_user.id,
+        "created_at": utc_now(),
+    }
+    grade_obj = Grade.model_construct(**doc)
     
     await db.grades.insert_one(doc)
     return grade_obj
 
-@api_router.get("/grades", response_model=List[Grade])
-async def get_grades(student_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+@api_router.get("/grades", response_model=None, responses={200: {"model": List[Grade]}})
+async def get_grades(
+    student_id: Optional[uuid.UUID] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: CurrentUser = Depends(get_current_user),
+):
     query = {}
     if student_id:
         query["student_id"] = student_id
     
-    grades = await db.grades.find(query, {"_id": 0}).to_list(1000)
-    for grade in grades:
-        if isinstance(grade.get('created_at'), str):
-            grade['created_at'] = datetime.fromisoformat(grade['created_at'])
-    return grades
+    grades, total = await asyncio.gather(
+        db.grades.find(query, {"_id": 0}).sort("_id", 1).skip(skip).limit(limit).to_list(limit),
+        db.grades.count_documents(query),
+    )
+    return ORJSONResponse(
+        _GRADE_LIST.dump_python([Grade.model_construct(**doc) for doc in grades], mode="json"),
+        headers={"X-Total-Count": str(total)},
+    )
 
 # Communication Routes
 @api_router.post("/announcements", response_model=Announcement)
-async def create_announcement(announcement_data: AnnouncementCreate, current_user: dict = Depends(get_current_user)):
-    if current_user["role"] not in ["admin", "teacher"]:
+async def create_announcement(announcement_data: AnnouncementCreate, current_user: CurrentUser = Depends(get_current_user)):
+    if current_user.role not in ["admin", "teacher"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    announcement_obj = Announcement(**announcement_data.model_dump(), author=current_user["full_name"])
-    doc = announcement_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
+    doc = {
+        **announcement_data.model_dump(),
+        "id": uuid.uuid4(),
+        "author": current_user.full_name,
+        "created_at": utc_now(),
+    }
+    announcement_obj = Announcement.model_construct(**doc)
     
     await db.announcements.insert_one(doc)
+    await _bump_collection_version("announcements")
     return announcement_obj
 
-@api_router.get("/announcements", response_model=List[Announcement])
-async def get_announcements(current_user: dict = Depends(get_current_user)):
+@api_router.get("/announcements", response_model=None, responses={200: {"model": List[Announcement]}})
+async def get_announcements(request: Request, current_user: CurrentUser = Depends(get_current_user)):
     query = {}
-    if current_user["role"] != "admin":
-        query["$or"] = [
-            {"target_role": None},
-            {"target_role": current_user["role"]}
-        ]
+    if current_user.role != "admin":
+        query["target_role"] = {"$in": [None, current_user.role]}
+    
+    # Non-admin roles see different subsets, so the role is part of the tag.
+    # As in get_students, the version is read before the data.
+    etag = f'"announcements-{await _collection_version("announcements")}-{current_user.role}"'
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
     
     announcements = await db.announcements.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    for announcement in announcements:
-        if isinstance(announcement.get('created_at'), str):
-            announcement['created_at'] = datetime.fromisoformat(announcement['created_at'])
-    return announcements
+    return ORJSONResponse(
+        _ANNOUNCEMENT_LIST.dump_python([Announcement.model_construct(**doc) for doc in announcements], mode="json"),
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
 
 # Dashboard Stats
+async def _count_attendance_by_status(match: dict) -> dict:
+    pipeline = [{"$match": match}, {"$group": {"_id": "$status", "n": {"$sum": 1}}}]
+    rows = await db.attendance.aggregate(pipeline).to_list(None)
+    return {row["_id"]: row["n"] for row in rows}
+
 @api_router.get("/dashboard/stats")
-async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
+async def get_dashboard_stats(current_user: CurrentUser = Depends(get_current_user)):
     stats = {}
     
-    if current_user["role"] == "admin":
-        stats["total_students"] = await db.students.count_documents({})
-        stats["total_teachers"] = await db.users.count_documents({"role": "teacher"})
-        stats["total_parents"] = await db.users.count_documents({"role": "parent"})
-        stats["total_announcements"] = await db.announcements.count_documents({})
-        
+    if current_user.role == "admin":
         # Recent attendance stats
         today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        stats["today_present"] = await db.attendance.count_documents({"date": today, "status": "present"})
-        stats["today_absent"] = await db.attendance.count_documents({"date": today, "status": "absent"})
+        (
+            stats["total_students"],
+            stats["total_teachers"],
+            stats["total_parents"],
+            stats["total_announcements"],
+            today_by_status,
+        ) = await asyncio.gather(
+            db.students.count_documents({}),
+            db.users.count_documents({"role": "teacher"}),
+            db.users.count_documents({"role": "parent"}),
+            db.announcements.count_documents({}),
+            _count_attendance_by_status({"date": today}),
+        )
+        stats["today_present"] = today_by_status.get("present", 0)
+        stats["today_absent"] = today_by_status.get("absent", 0)
         
-    elif current_user["role"] == "teacher":
+    elif current_user.role == "teacher":
         stats["total_students"] = await db.students.count_documents({})
         stats["classes_today"] = 5  # Mock data
         stats["pending_grades"] = 12  # Mock data
         
-    elif current_user["role"] == "student":
+    elif current_user.role == "student":
         # Find student record
-        student = await db.students.find_one({"user_id": current_user["id"]})
+        student = await db.students.find_one({"user_id": current_user.id}, {"_id": 0, "id": 1})
         if student:
-            stats["total_attendance"] = await db.attendance.count_documents({"student_id": student["id"]})
-            stats["present_days"] = await db.attendance.count_documents({"student_id": student["id"], "status": "present"})
-            stats["total_grades"] = await db.grades.count_documents({"student_id": student["id"]})
+            by_status, stats["total_grades"] = await asyncio.gather(
+                _count_attendance_by_status({"student_id": student["id"]}),
+                db.grades.count_documents({"student_id": student["id"]}),
+            )
+            stats["total_attendance"] = sum(by_status.values())
+            stats["present_days"] = by_status.get("present", 0)
     
-    elif current_user["role"] == "parent":
+    elif current_user.role == "parent":
         # Count children (students with this parent_id)
-        stats["children_count"] = await db.students.count_documents({"parent_id": current_user["id"]})
-        stats["announcements_count"] = await db.announcements.count_documents({
-            "$or": [{"target_role": None}, {"target_role": "parent"}]
-        })
+        stats["children_count"], stats["announcements_count"] = await asyncio.gather(
+            db.students.count_documents({"parent_id": current_user.id}),
+            db.announcements.count_documents({"target_role": {"$in": [None, "parent"]}}),
+        )
         stats["events_count"] = 3  # Mock data for upcoming events
             
     return stats
@@ -387,12 +580,14 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
 app.include_router(api_router)
 
 # CORS
+CORS_ORIGINS = tuple(origin.strip() for origin in os.environ.get('CORS_ORIGINS', '*').split(','))
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ORIGINS,
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "If-None-Match"],
+    expose_headers=["X-Total-Count", "ETag"],
 )
 
 # Logging
@@ -402,6 +597,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def migrate_string_ids():
+    # Ids are queried as BSON UUIDs; convert legacy string ids before serving
+    await migrate_uuid_ids(db, report=logger.info, warn=logger.warning)
+
+@app.on_event("startup")
+async def ensure_indexes():
+    await db.users.create_index("username", unique=True)
+    await db.users.create_index("id", unique=True)
+    await db.users.create_index("role")
+    await db.students.create_index("id", unique=True)
+    await db.students.create_index("user_id")
+    await db.students.create_index("parent_id")
+    await db.attendance.create_index([("date", 1), ("status", 1)])
+    # Filtered list pages sort on _id, so the filter field leads and _id follows
+    await db.attendance.create_index([("student_id", 1), ("_id", 1)])
+    await db.attendance.create_index([("date", 1), ("_id", 1)])
+    await db.grades.create_index([("student_id", 1), ("_id", 1)])
+    await db.announcements.create_index([("created_at", -1)])
+    await db.announcements.create_index([("target_role", 1), ("created_at", -1)])
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
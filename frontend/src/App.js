@@ -37,6 +37,29 @@ import {
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+const PAGE_SIZE = 200;
+
+// List endpoints are paginated; walk the pages using the X-Total-Count header
+const fetchAllPages = async (path, params = {}) => {
+  const items = [];
+  let total = Infinity;
+  while (items.length < total) {
+    const response = await axios.get(`${API}${path}`, {
+      params: { ...params, skip: items.length, limit: PAGE_SIZE }
+    });
+    items.push(...response.data);
+    total = parseInt(response.headers['x-total-count'], 10);
+    if (Number.isNaN(total)) total = items.length;
+    if (response.data.length < PAGE_SIZE) break;
+  }
+  return items;
+};
+
+// Resolve the student record linked to a student-role user
+const fetchOwnStudentRecord = async (userId) => {
+  const response = await axios.get(`${API}/students`, { params: { user_id: userId, limit: 1 } });
+  return response.data[0];
+};
 
 // Auth Context
 const AuthContext = React.createContext(null);
@@ -433,8 +456,7 @@ const StudentsTab = () => {
 
   const fetchStudents = async () => {
     try {
-      const response = await axios.get(`${API}/students`);
-      setStudents(response.data);
+      setStudents(await fetchAllPages('/students'));
     } catch (error) {
       toast.error('Failed to fetch students');
     } finally {
@@ -609,8 +631,7 @@ const AttendanceTab = () => {
 
   const fetchStudents = async () => {
     try {
-      const response = await axios.get(`${API}/students`);
-      setStudents(response.data);
+      setStudents(await fetchAllPages('/students'));
     } catch (error) {
       console.error('Failed to fetch students:', error);
     }
@@ -621,17 +642,14 @@ const AttendanceTab = () => {
       // If student, fetch only their own attendance
       if (user?.role === 'student') {
         // First get student record for this user
-        const studentsResponse = await axios.get(`${API}/students`);
-        const studentRecord = studentsResponse.data.find(s => s.user_id === user.id);
+        const studentRecord = await fetchOwnStudentRecord(user.id);
         
         if (studentRecord) {
           setMyStudentId(studentRecord.id);
-          const response = await axios.get(`${API}/attendance?student_id=${studentRecord.id}`);
-          setAttendanceRecords(response.data);
+          setAttendanceRecords(await fetchAllPages('/attendance', { student_id: studentRecord.id }));
         }
       } else {
-        const response = await axios.get(`${API}/attendance`);
-        setAttendanceRecords(response.data);
+        setAttendanceRecords(await fetchAllPages('/attendance'));
       }
     } catch (error) {
       toast.error('Failed to fetch attendance');
@@ -852,8 +870,7 @@ const GradesTab = () => {
 
   const fetchStudents = async () => {
     try {
-      const response = await axios.get(`${API}/students`);
-      setStudents(response.data);
+      setStudents(await fetchAllPages('/students'));
     } catch (error) {
       console.error('Failed to fetch students:', error);
     }
@@ -863,17 +880,14 @@ const GradesTab = () => {
     try {
       // If student, fetch only their own grades
       if (user?.role === 'student') {
-        const studentsResponse = await axios.get(`${API}/students`);
-        const studentRecord = studentsResponse.data.find(s => s.user_id === user.id);
+        const studentRecord = await fetchOwnStudentRecord(user.id);
         
         if (studentRecord) {
           setMyStudentId(studentRecord.id);
-          const response = await axios.get(`${API}/grades?student_id=${studentRecord.id}`);
-          setGrades(response.data);
+          setGrades(await fetchAllPages('/grades', { student_id: studentRecord.id }));
         }
       } else {
-        const response = await axios.get(`${API}/grades`);
-        setGrades(response.data);
+        setGrades(await fetchAllPages('/grades'));
       }
     } catch (error) {
       toast.error('Failed to fetch grades');